@@ -426,19 +426,19 @@ def get_updated_capabilities(current_capabilities, new_capabilities):
 
     cap_dict = {}
     if current_capabilities:
-        try:
-            cap_dict = dict(x.split(':', 1)
-                            for x in current_capabilities.split(','))
-        except ValueError:
-            # Capabilities can be filled by operator.  ValueError can
-            # occur in malformed capabilities like:
-            # properties/capabilities='boot_mode:bios,boot_option'.
-            raise ValueError(
-                _("Invalid capabilities string '%s'.") % current_capabilities)
+        for capability in current_capabilities.split(','):
+            key, sep, value = capability.partition(':')
+            if not sep:
+                # Capabilities can be filled by operator. A separator can
+                # be missing in malformed capabilities like:
+                # properties/capabilities='boot_mode:bios,boot_option'.
+                raise ValueError(
+                    _("Invalid capabilities string '%s'.")
+                    % current_capabilities)
+            cap_dict[key] = value
 
     cap_dict.update(new_capabilities)
-    return ','.join('%(key)s:%(value)s' % {'key': key, 'value': value}
-                    for key, value in cap_dict.items())
+    return ','.join(['%s:%s' % item for item in cap_dict.items()])
 
 
 def is_regex_string_in_file(path, string):
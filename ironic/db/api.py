@@ -275,6 +275,14 @@ class Connection(object, metaclass=abc.ABCMeta):
         :returns: A port.
         """
 
+    @abc.abstractmethod
+    def get_existing_port_addresses(self, addresses):
+        """Return which of the given MAC addresses are used by ports.
+
+        :param addresses: A list of MAC addresses.
+        :returns: A list of the addresses already in use by a port.
+        """
+
     @abc.abstractmethod
     def get_port_by_name(self, port_name):
         """Return a network port representation.
@@ -341,6 +349,16 @@ class Connection(object, metaclass=abc.ABCMeta):
         :param values: Dict of values.
         """
 
+    @abc.abstractmethod
+    def create_ports(self, values_list):
+        """Create several new ports in a single transaction.
+
+        :param values_list: List of dicts of values, one per port.
+        :raises: MACAlreadyExists if any of the addresses is already in use.
+        :raises: PortAlreadyExists if any of the UUIDs is already in use.
+        :returns: A list of ports.
+        """
+
     @abc.abstractmethod
     def update_port(self, port_id, values):
         """Update properties of an port.
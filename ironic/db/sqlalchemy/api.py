@@ -984,6 +984,12 @@ class Connection(api.Connection):
             raise exception.PortNotFound(port=address)
         return res
 
+    def get_existing_port_addresses(self, addresses):
+        with _session_for_read() as session:
+            query = session.query(models.Port.address).filter(
+                models.Port.address.in_(addresses))
+            return [address for address, in query]
+
     def get_port_by_name(self, port_name):
         try:
             with _session_for_read() as session:
@@ -1056,6 +1062,34 @@ class Connection(api.Connection):
             raise exception.PortAlreadyExists(uuid=values['uuid'])
         return port
 
+    @oslo_db_api.retry_on_deadlock
+    def create_ports(self, values_list):
+        ports = []
+        for values in values_list:
+            if not values.get('uuid'):
+                values['uuid'] = uuidutils.generate_uuid()
+            port = models.Port()
+            port.update(values)
+            ports.append(port)
+
+        try:
+            with _session_for_write() as session:
+                session.add_all(ports)
+                session.flush()
+        except db_exc.DBDuplicateEntry as exc:
+            # Not all backends report the duplicate value (SQLite does
+            # not), fall back to the values we tried to insert.
+            if 'address' in exc.columns:
+                addresses = [values['address'] for values in values_list]
+                # The duplicate may also be within the batch itself.
+                mac = exc.value or ', '.join(
+                    self.get_existing_port_addresses(addresses) or addresses)
+                raise exception.MACAlreadyExists(mac=mac)
+            raise exception.PortAlreadyExists(
+                uuid=exc.value or ', '.join(values['uuid']
+                                            for values in values_list))
+        return ports
+
     @oslo_db_api.retry_on_deadlock
     def update_port(self, port_id, values):
         # NOTE(dtantsur): this can lead to very strange errors
@@ -12,6 +12,9 @@
 """
 iLO Inspect Interface
 """
+import functools
+
+import eventlet
 from ironic_lib import metrics_utils
 from oslo_log import log as logging
 from oslo_utils import importutils
@@ -31,23 +34,24 @@ LOG = logging.getLogger(__name__)
 
 METRICS = metrics_utils.get_metrics_logger(__name__)
 
-CAPABILITIES_KEYS = {'secure_boot', 'rom_firmware_version',
-                     'ilo_firmware_version', 'server_model',
-                     'pci_gpu_devices', 'sriov_enabled', 'nic_capacity',
-                     'has_ssd', 'has_rotational',
-                     'rotational_drive_4800_rpm',
-                     'rotational_drive_5400_rpm',
-                     'rotational_drive_7200_rpm',
-                     'rotational_drive_10000_rpm',
-                     'rotational_drive_15000_rpm',
-                     'logical_raid_level_0', 'logical_raid_level_1',
-                     'logical_raid_level_2', 'logical_raid_level_10',
-                     'logical_raid_level_5', 'logical_raid_level_6',
-                     'logical_raid_level_50', 'logical_raid_level_60',
-                     'cpu_vt', 'hardware_supports_raid', 'has_nvme_ssd',
-                     'nvdimm_n', 'logical_nvdimm_n', 'persistent_memory',
-                     'overall_security_status', 'security_override_switch',
-                     'last_firmware_scan_result'}
+CAPABILITIES_KEYS = frozenset({
+    'secure_boot', 'rom_firmware_version',
+    'ilo_firmware_version', 'server_model',
+    'pci_gpu_devices', 'sriov_enabled', 'nic_capacity',
+    'has_ssd', 'has_rotational',
+    'rotational_drive_4800_rpm',
+    'rotational_drive_5400_rpm',
+    'rotational_drive_7200_rpm',
+    'rotational_drive_10000_rpm',
+    'rotational_drive_15000_rpm',
+    'logical_raid_level_0', 'logical_raid_level_1',
+    'logical_raid_level_2', 'logical_raid_level_10',
+    'logical_raid_level_5', 'logical_raid_level_6',
+    'logical_raid_level_50', 'logical_raid_level_60',
+    'cpu_vt', 'hardware_supports_raid', 'has_nvme_ssd',
+    'nvdimm_n', 'logical_nvdimm_n', 'persistent_memory',
+    'overall_security_status', 'security_override_switch',
+    'last_firmware_scan_result'})
 
 
 def _get_essential_properties(node, ilo_object):
@@ -84,8 +88,10 @@ def _validate(node, data):
     if data.get('properties'):
         if isinstance(data['properties'], dict):
             valid_keys = IloInspect.ESSENTIAL_PROPERTIES
-            missing_keys = valid_keys - set(data['properties'])
-            if missing_keys:
+            # Dict views support set operations, so the common case of all
+            # the keys being present does not build any intermediate set.
+            if not valid_keys <= data['properties'].keys():
+                missing_keys = valid_keys - data['properties'].keys()
                 error = (_(
                     "Server didn't return the key(s): %(key)s") %
                     {'key': ', '.join(missing_keys)})
@@ -113,6 +119,23 @@ def _validate(node, data):
         raise exception.HardwareInspectionFailure(error=error)
 
 
+@functools.lru_cache(maxsize=256)
+def _get_supported_capabilities_keys(keys):
+    """Filters capability names down to the ones supported in ironic.
+
+    Only the capability names are used for filtering, so the result is
+    cached per set of names returned by the hardware.
+
+    :param keys: a frozenset of capability names as returned by the hardware.
+    :returns: a frozenset of the capability names supported by ironic.
+
+    """
+    # Add the capabilities starting with "gpu_" to the supported capabilities
+    # keys set as they are runtime generated keys and cannot be hardcoded.
+    return CAPABILITIES_KEYS.intersection(keys).union(
+        k for k in keys if k.startswith("gpu_"))
+
+
 def _create_supported_capabilities_dict(capabilities):
     """Creates a capabilities dictionary from supported capabilities in ironic.
 
@@ -122,17 +145,8 @@ def _create_supported_capabilities_dict(capabilities):
               and returned by hardware.
 
     """
-    valid_cap = {}
-
-    # Add the capabilities starting with "gpu_" to the supported capabilities
-    # keys set as they are runtime generated keys and cannot be hardcoded.
-    for k in capabilities:
-        if k.startswith("gpu_"):
-            valid_cap[k] = capabilities.get(k)
-
-    for key in CAPABILITIES_KEYS.intersection(capabilities):
-        valid_cap[key] = capabilities.get(key)
-    return valid_cap
+    keys = _get_supported_capabilities_keys(frozenset(capabilities))
+    return {key: capabilities[key] for key in keys}
 
 
 def _get_capabilities(node, ilo_object):
@@ -212,72 +226,77 @@ class IloInspect(base.InspectInterface):
         :returns: The resulting state of inspection.
 
         """
+        node = task.node
         power_turned_on = False
-        ilo_object = ilo_common.get_ilo_object(task.node)
+        ilo_object = ilo_common.get_ilo_object(node)
         try:
             state = task.driver.power.get_power_state(task)
         except exception.IloOperationError as ilo_exception:
             operation = (_("Inspecting hardware (get_power_state) on %s")
-                         % task.node.uuid)
+                         % node.uuid)
             raise exception.IloOperationError(operation=operation,
                                               error=ilo_exception)
         if state != states.POWER_ON:
             LOG.info("The node %s is not powered on. Powering on the "
-                     "node for inspection.", task.node.uuid)
+                     "node for inspection.", node.uuid)
             conductor_utils.node_power_action(task, states.POWER_ON)
             power_turned_on = True
 
-        # get the essential properties and update the node properties
-        # with it.
-
-        inspected_properties = {}
-        result = _get_essential_properties(task.node, ilo_object)
-
-        # A temporary hook for OOB inspection to not to update 'local_gb'
-        # for hardware if the storage is a "Direct Attached Storage" or
-        # "Dynamic Smart Array Controllers" and the operator has manually
-        # updated the local_gb in node properties prior to node inspection.
-        # This will be removed once we have inband inspection support for
-        # ilo drivers.
-        current_local_gb = task.node.properties.get('local_gb')
-        properties = result['properties']
-        if current_local_gb:
-            if properties['local_gb'] == 0 and current_local_gb > 0:
-                properties['local_gb'] = current_local_gb
-                LOG.warning('Could not discover size of disk on the node '
-                            '%s. Value of `properties/local_gb` of the '
-                            'node is not overwritten.', task.node.uuid)
-
-        for known_property in self.ESSENTIAL_PROPERTIES:
-            inspected_properties[known_property] = properties[known_property]
-        node_properties = task.node.properties
-        node_properties.update(inspected_properties)
-        task.node.properties = node_properties
-
-        # Inspect the hardware for additional hardware capabilities.
-        # Since additional hardware capabilities may not apply to all the
-        # hardwares, the method inspect_hardware() doesn't raise an error
-        # for these capabilities.
-        capabilities = _get_capabilities(task.node, ilo_object)
+        node_properties = dict(node.properties)
+
+        # Inspect the hardware for additional hardware capabilities while
+        # the essential properties are being fetched, the two queries to
+        # the iLO are independent of each other. The greenthread gets its
+        # own client so that no client has two requests in flight.
+        capabilities_thread = eventlet.spawn(
+            _get_capabilities, node, ilo_common.get_ilo_object(node))
+        try:
+            # get the essential properties and update the node properties
+            # with it.
+            result = _get_essential_properties(node, ilo_object)
+
+            # A temporary hook for OOB inspection to not to update
+            # 'local_gb' for hardware if the storage is a "Direct Attached
+            # Storage" or "Dynamic Smart Array Controllers" and the operator
+            # has manually updated the local_gb in node properties prior to
+            # node inspection. This will be removed once we have inband
+            # inspection support for ilo drivers.
+            current_local_gb = node_properties.get('local_gb')
+            properties = result['properties']
+            if current_local_gb:
+                if properties['local_gb'] == 0 and current_local_gb > 0:
+                    properties['local_gb'] = current_local_gb
+                    LOG.warning('Could not discover size of disk on the '
+                                'node %s. Value of `properties/local_gb` of '
+                                'the node is not overwritten.', node.uuid)
+
+            inspected_properties = {k: properties[k]
+                                    for k in self.ESSENTIAL_PROPERTIES}
+            node_properties.update(inspected_properties)
+        finally:
+            # Always let the capabilities query finish rather than leave
+            # it running or abort a request in flight on the iLO.
+            # Since additional hardware capabilities may not apply to all
+            # the hardwares, the method inspect_hardware() doesn't raise an
+            # error for these capabilities.
+            capabilities = capabilities_thread.wait()
         model = None
         if capabilities:
             model = capabilities.get('server_model')
             valid_cap = _create_supported_capabilities_dict(capabilities)
             capabilities = utils.get_updated_capabilities(
-                task.node.properties.get('capabilities'), valid_cap)
+                node_properties.get('capabilities'), valid_cap)
             if capabilities:
                 node_properties['capabilities'] = capabilities
-                task.node.properties = node_properties
 
         # Inspect the hardware for security parameters related information.
         # Since it applies only for Gen10 based hardware, the method
         # inspect_hardware() doesn't raise an error.
         if model and 'Gen10' in model:
-            security_params = _get_security_parameters(task.node, ilo_object)
+            security_params = _get_security_parameters(node, ilo_object)
             if security_params:
                 node_properties['security_parameters'] = (
                     security_params.get('security_parameters'))
-                task.node.properties = node_properties
 
         # RIBCL(Gen8) protocol cannot determine if a NIC
         # is physically connected with cable or not when the server
@@ -295,8 +314,12 @@ class IloInspect(base.InspectInterface):
                         'Hence returns all the MACs present on the server. '
                         'Please remove the ironic ports created for inactive '
                         'NICs manually for the node %(node)s',
-                        {"node": task.node.uuid})
-        task.node.save()
+                        {"node": node.uuid})
+        node.properties = node_properties
+        if not power_turned_on:
+            # Otherwise the updated properties are saved along with the
+            # power state when the node is powered off below.
+            node.save()
 
         # Create ports for the nics detected.
         inspect_utils.create_ports_if_not_exist(
@@ -305,12 +328,12 @@ class IloInspect(base.InspectInterface):
         LOG.debug("Node properties for %(node)s are updated as "
                   "%(properties)s",
                   {'properties': inspected_properties,
-                   'node': task.node.uuid})
+                   'node': node.uuid})
 
-        LOG.info("Node %s inspected.", task.node.uuid)
+        LOG.info("Node %s inspected.", node.uuid)
         if power_turned_on:
             conductor_utils.node_power_action(task, states.POWER_OFF)
             LOG.info("The node %s was powered on for inspection. "
                      "Powered off the node as inspection completed.",
-                     task.node.uuid)
+                     node.uuid)
         return states.MANAGEABLE
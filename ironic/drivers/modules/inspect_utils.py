@@ -48,6 +48,7 @@ def create_ports_if_not_exist(task, macs=None):
             return
 
     node = task.node
+    ports = []
     for mac in macs:
         if not netutils.is_valid_mac(mac):
             LOG.warning("Ignoring NIC address %(address)s for node %(node)s "
@@ -56,15 +57,50 @@ def create_ports_if_not_exist(task, macs=None):
             continue
 
         port_dict = {'address': mac, 'node_id': node.id}
-        port = objects.Port(task.context, **port_dict)
+        ports.append(objects.Port(task.context, **port_dict))
 
+    if not ports:
+        return
+
+    try:
+        objects.Port.create_many(task.context, ports)
+    except exception.MACAlreadyExists:
+        # The bulk insert is rolled back as a whole, look up the addresses
+        # already in use and only create the ports for the rest.
+        existing = set(objects.Port.get_existing_addresses(
+            task.context, [port.address for port in ports]))
+        for port in ports:
+            if port.address in existing:
+                LOG.info("Port already exists for MAC address %(address)s "
+                         "for node %(node)s", {'address': port.address,
+                                               'node': node.uuid})
+        ports = [port for port in ports if port.address not in existing]
+        if not ports:
+            return
+        try:
+            objects.Port.create_many(task.context, ports)
+        except exception.MACAlreadyExists:
+            # Some ports were created concurrently, fall back to creating
+            # the ports one by one.
+            _create_ports_one_by_one(ports, node)
+            return
+
+    for port in ports:
+        LOG.info("Port created for MAC address %(address)s for node "
+                 "%(node)s", {'address': port.address, 'node': node.uuid})
+
+
+def _create_ports_one_by_one(ports, node):
+    for port in ports:
         try:
             port.create()
             LOG.info("Port created for MAC address %(address)s for node "
-                     "%(node)s", {'address': mac, 'node': node.uuid})
+                     "%(node)s", {'address': port.address,
+                                  'node': node.uuid})
         except exception.MACAlreadyExists:
             LOG.info("Port already exists for MAC address %(address)s "
-                     "for node %(node)s", {'address': mac, 'node': node.uuid})
+                     "for node %(node)s", {'address': port.address,
+                                           'node': node.uuid})
 
 
 def clean_up_swift_entries(task):
@@ -251,6 +251,23 @@ class Port(base.IronicObject, object_base.VersionedObjectDictCompat):
         port = cls._from_db_object(context, cls(), db_port)
         return port
 
+    # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
+    # methods can be used in the future to replace current explicit RPC calls.
+    # Implications of calling new remote procedures should be thought through.
+    # @object_base.remotable_classmethod
+    @classmethod
+    def get_existing_addresses(cls, context, addresses):
+        """Return which of the given addresses are already used by ports.
+
+        :param cls: the :class:`Port`
+        :param context: Security context
+        :param addresses: a list of MAC addresses.
+        :returns: a list of the addresses already in use, in no
+                  particular order.
+
+        """
+        return cls.dbapi.get_existing_port_addresses(addresses)
+
     # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
     # methods can be used in the future to replace current explicit RPC calls.
     # Implications of calling new remote procedures should be thought through.
@@ -406,6 +423,30 @@ class Port(base.IronicObject, object_base.VersionedObjectDictCompat):
         db_port = self.dbapi.get_port_by_id(db_port['id'])
         self._from_db_object(self._context, self, db_port)
 
+    # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
+    # methods can be used in the future to replace current explicit RPC calls.
+    # Implications of calling new remote procedures should be thought through.
+    # @object_base.remotable_classmethod
+    @classmethod
+    def create_many(cls, context, ports):
+        """Create several Port records in the DB in a single transaction.
+
+        Unlike :meth:`create`, the objects are not reloaded from the DB
+        afterwards, only their ``id`` and ``uuid`` are set.
+
+        :param context: Security context.
+        :param ports: a list of :class:`Port` objects to create.
+        :raises: MACAlreadyExists if 'address' column is not unique
+        :raises: PortAlreadyExists if 'uuid' column is not unique
+
+        """
+        db_ports = cls.dbapi.create_ports(
+            [port.do_version_changes_for_db() for port in ports])
+        for port, db_port in zip(ports, db_ports):
+            port.id = db_port['id']
+            port.uuid = db_port['uuid']
+            port.obj_reset_changes()
+
     # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
     # methods can be used in the future to replace current explicit RPC calls.
     # Implications of calling new remote procedures should be thought through.
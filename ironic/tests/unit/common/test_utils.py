@@ -534,6 +534,19 @@ class GetUpdatedCapabilitiesTestCase(base.TestCase):
                           utils.get_updated_capabilities,
                           capabilities, {})
 
+    def test_get_updated_capabilities_invalid_capabilities_separator(self):
+        for capabilities in ('foo:bar,', ',foo:bar', 'foo:bar,,baz:qux',
+                             'foo:bar,baz'):
+            self.assertRaises(ValueError,
+                              utils.get_updated_capabilities,
+                              capabilities, {})
+
+    def test_get_updated_capabilities_value_with_colon(self):
+        cap_returned = utils.get_updated_capabilities('foo:bar:baz',
+                                                      {'BootMode': 'uefi'})
+        self.assertEqual({'foo:bar:baz', 'BootMode:uefi'},
+                         set(cap_returned.split(',')))
+
     def test_get_updated_capabilities_capabilities_not_dict(self):
         capabilities = ['ilo_firmware_version:xyz', 'foo:bar']
         self.assertRaises(ValueError,
@@ -277,6 +277,48 @@ class DbPortTestCase(base.DbTestCase):
                           node_id=self.node.id,
                           address=self.port.address)
 
+    def test_create_ports(self):
+        ports = self.dbapi.create_ports(
+            [{'node_id': self.node.id, 'address': 'aa-bb-cc-11-22-33',
+              'uuid': uuidutils.generate_uuid()},
+             {'node_id': self.node.id, 'address': 'aa-bb-cc-11-22-44'}])
+        self.assertEqual(2, len(ports))
+        res = self.dbapi.get_ports_by_node_id(self.node.id)
+        self.assertEqual({self.port.address, 'aa-bb-cc-11-22-33',
+                          'aa-bb-cc-11-22-44'},
+                         {r.address for r in res})
+
+    def test_create_ports_duplicated_address(self):
+        exc = self.assertRaises(exception.MACAlreadyExists,
+                                self.dbapi.create_ports,
+                                [{'node_id': self.node.id,
+                                  'address': 'aa-bb-cc-11-22-33'},
+                                 {'node_id': self.node.id,
+                                  'address': self.port.address}])
+        self.assertIn(self.port.address, str(exc))
+        self.assertNotIn('aa-bb-cc-11-22-33', str(exc))
+        self.assertNotIn('None', str(exc))
+        res = self.dbapi.get_ports_by_node_id(self.node.id)
+        self.assertEqual([self.port.address], [r.address for r in res])
+
+    def test_create_ports_duplicated_address_in_batch(self):
+        exc = self.assertRaises(exception.MACAlreadyExists,
+                                self.dbapi.create_ports,
+                                [{'node_id': self.node.id,
+                                  'address': 'aa-bb-cc-11-22-33'},
+                                 {'node_id': self.node.id,
+                                  'address': 'aa-bb-cc-11-22-33'}])
+        self.assertIn('aa-bb-cc-11-22-33', str(exc))
+
+    def test_get_existing_port_addresses(self):
+        res = self.dbapi.get_existing_port_addresses(
+            ['aa:bb:cc:11:22:33', self.port.address])
+        self.assertEqual([self.port.address], res)
+
+    def test_get_existing_port_addresses_none(self):
+        res = self.dbapi.get_existing_port_addresses(['aa:bb:cc:11:22:33'])
+        self.assertEqual([], res)
+
     def test_create_port_duplicated_uuid(self):
         self.assertRaises(exception.PortAlreadyExists,
                           db_utils.create_test_port,
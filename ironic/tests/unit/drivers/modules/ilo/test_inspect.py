@@ -84,6 +84,110 @@ class IloInspectTestCase(test_common.BaseIloTest):
             create_port_mock.assert_called_once_with(
                 task, ['aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb'])
 
+    @mock.patch.object(ilo_inspect.eventlet, 'spawn', autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_capabilities', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(inspect_utils, 'create_ports_if_not_exist',
+                       spec_set=True, autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_essential_properties', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_power.IloPower, 'get_power_state', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_common, 'get_ilo_object', spec_set=True,
+                       autospec=True)
+    def test_inspect_capabilities_in_greenthread(self, get_ilo_object_mock,
+                                                 power_mock,
+                                                 get_essential_mock,
+                                                 create_port_mock,
+                                                 get_capabilities_mock,
+                                                 spawn_mock):
+        ilo_object_mock = get_ilo_object_mock.return_value
+        properties = {'memory_mb': '512', 'local_gb': '10',
+                      'cpu_arch': 'x86_64'}
+        macs = {'Port 1': 'aa:aa:aa:aa:aa:aa'}
+        get_essential_mock.return_value = {'properties': properties,
+                                           'macs': macs}
+        spawn_mock.return_value.wait.return_value = {
+            'sriov_enabled': 'true'}
+        power_mock.return_value = states.POWER_ON
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.driver.inspect.inspect_hardware(task)
+            spawn_mock.assert_called_once_with(get_capabilities_mock,
+                                               task.node, ilo_object_mock)
+            spawn_mock.return_value.wait.assert_called_once_with()
+            # The greenthread gets a client of its own.
+            get_ilo_object_mock.assert_has_calls([mock.call(task.node),
+                                                  mock.call(task.node)])
+            # The capabilities are only retrieved by the greenthread.
+            self.assertFalse(get_capabilities_mock.called)
+            self.assertEqual('sriov_enabled:true',
+                             task.node.properties['capabilities'])
+
+    @mock.patch.object(ilo_inspect.eventlet, 'spawn', autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_capabilities', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(inspect_utils, 'create_ports_if_not_exist',
+                       spec_set=True, autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_essential_properties', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_power.IloPower, 'get_power_state', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_common, 'get_ilo_object', spec_set=True,
+                       autospec=True)
+    def test_inspect_essential_fail(self, get_ilo_object_mock,
+                                    power_mock,
+                                    get_essential_mock,
+                                    create_port_mock,
+                                    get_capabilities_mock,
+                                    spawn_mock):
+        get_essential_mock.side_effect = (
+            exception.HardwareInspectionFailure(error='boom'))
+        power_mock.return_value = states.POWER_ON
+        capabilities_thread = spawn_mock.return_value
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            properties = dict(task.node.properties)
+            self.assertRaises(exception.HardwareInspectionFailure,
+                              task.driver.inspect.inspect_hardware, task)
+            self.assertEqual(properties, task.node.properties)
+            self.assertFalse(create_port_mock.called)
+        # The pending capabilities query is waited for, not aborted.
+        capabilities_thread.wait.assert_called_once_with()
+        self.assertFalse(capabilities_thread.kill.called)
+
+    @mock.patch.object(ilo_inspect.eventlet, 'spawn', autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_capabilities', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(inspect_utils, 'create_ports_if_not_exist',
+                       spec_set=True, autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_essential_properties', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_power.IloPower, 'get_power_state', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_common, 'get_ilo_object', spec_set=True,
+                       autospec=True)
+    def test_inspect_essential_invalid(self, get_ilo_object_mock,
+                                       power_mock,
+                                       get_essential_mock,
+                                       create_port_mock,
+                                       get_capabilities_mock,
+                                       spawn_mock):
+        # 'cpu_arch' is missing from the inspected properties.
+        properties = {'memory_mb': '512', 'local_gb': '10'}
+        macs = {'Port 1': 'aa:aa:aa:aa:aa:aa'}
+        get_essential_mock.return_value = {'properties': properties,
+                                           'macs': macs}
+        power_mock.return_value = states.POWER_ON
+        capabilities_thread = spawn_mock.return_value
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            self.assertRaises(KeyError,
+                              task.driver.inspect.inspect_hardware, task)
+            self.assertFalse(create_port_mock.called)
+        # The capabilities query does not outlive a failed inspection.
+        capabilities_thread.wait.assert_called_once_with()
+
     @mock.patch.object(ilo_inspect.LOG, 'warning',
                        spec_set=True, autospec=True)
     @mock.patch.object(ilo_inspect, '_get_capabilities', spec_set=True,
@@ -217,6 +321,12 @@ class IloInspectTestCase(test_common.BaseIloTest):
             self.assertFalse(log_mock.called)
             get_capabilities_mock.assert_called_once_with(task.node,
                                                           ilo_object_mock)
+            get_security_params_mock.assert_called_once_with(task.node,
+                                                             ilo_object_mock)
+            # The capabilities greenthread uses a client of its own.
+            get_ilo_object_mock.assert_has_calls([mock.call(task.node),
+                                                  mock.call(task.node)])
+            self.assertEqual(2, get_ilo_object_mock.call_count)
             create_port_mock.assert_called_once_with(
                 task, ['aa:aa:aa:aa:aa:aa'])
 
@@ -260,6 +370,48 @@ class IloInspectTestCase(test_common.BaseIloTest):
             create_port_mock.assert_called_once_with(
                 task, ['aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb'])
 
+    @mock.patch.object(ilo_inspect, '_get_capabilities', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(inspect_utils, 'create_ports_if_not_exist',
+                       spec_set=True, autospec=True)
+    @mock.patch.object(ilo_inspect, '_get_essential_properties', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_power.IloPower, 'set_power_state', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_power.IloPower, 'get_power_state', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(ilo_common, 'get_ilo_object', spec_set=True,
+                       autospec=True)
+    def test_inspect_essential_ok_power_off_saved_once(self,
+                                                       get_ilo_object_mock,
+                                                       power_mock,
+                                                       set_power_mock,
+                                                       get_essential_mock,
+                                                       create_port_mock,
+                                                       get_capabilities_mock):
+        properties = {'memory_mb': '512', 'local_gb': '10',
+                      'cpu_arch': 'x86_64'}
+        macs = {'Port 1': 'aa:aa:aa:aa:aa:aa'}
+        get_essential_mock.return_value = {'properties': properties,
+                                           'macs': macs}
+        get_capabilities_mock.return_value = {}
+        power_mock.side_effect = [states.POWER_OFF, states.POWER_OFF,
+                                  states.POWER_ON]
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            with mock.patch.object(task.node, 'save',
+                                   wraps=task.node.save) as save_mock:
+                task.driver.inspect.inspect_hardware(task)
+                # Two saves for each power action, the inspected properties
+                # are saved along with powering the node off.
+                self.assertEqual(4, save_mock.call_count)
+            set_power_mock.assert_has_calls(
+                [mock.call(mock.ANY, task, states.POWER_ON, timeout=None),
+                 mock.call(mock.ANY, task, states.POWER_OFF, timeout=None)])
+        self.node.refresh()
+        self.assertEqual(properties, self.node.properties)
+        self.assertEqual(states.POWER_OFF, self.node.power_state)
+
     @mock.patch.object(ilo_inspect, '_get_capabilities', spec_set=True,
                        autospec=True)
     @mock.patch.object(inspect_utils, 'create_ports_if_not_exist',
@@ -485,3 +637,19 @@ class TestInspectPrivateMethods(test_common.BaseIloTest):
         capabilities.update({'unknown_property': 'true'})
         cap = ilo_inspect._create_supported_capabilities_dict(capabilities)
         self.assertEqual(expected, cap)
+
+    def test___create_supported_capabilities_dict_same_keys(self):
+        ilo_inspect._get_supported_capabilities_keys.cache_clear()
+        cap1 = ilo_inspect._create_supported_capabilities_dict(
+            {'server_model': 'Gen9', 'gpu_Nvidia_count': 1,
+             'unknown_property': 'true'})
+        cap2 = ilo_inspect._create_supported_capabilities_dict(
+            {'server_model': 'Gen10', 'gpu_Nvidia_count': True,
+             'unknown_property': 'false'})
+        self.assertEqual({'server_model': 'Gen9', 'gpu_Nvidia_count': 1},
+                         cap1)
+        self.assertEqual({'server_model': 'Gen10', 'gpu_Nvidia_count': True},
+                         cap2)
+        self.assertIs(True, cap2['gpu_Nvidia_count'])
+        self.assertEqual(
+            1, ilo_inspect._get_supported_capabilities_keys.cache_info().hits)
@@ -27,6 +27,7 @@ from ironic.conf import CONF
 from ironic.drivers.modules import inspect_utils as utils
 from ironic import objects
 from ironic.tests.unit.db import base as db_base
+from ironic.tests.unit.db import utils as db_utils
 from ironic.tests.unit.objects import utils as obj_utils
 
 sushy = importutils.try_import('sushy')
@@ -41,57 +42,97 @@ class InspectFunctionTestCase(db_base.DbTestCase):
                                                boot_interface='pxe')
 
     @mock.patch.object(utils.LOG, 'info', spec_set=True, autospec=True)
-    @mock.patch.object(objects, 'Port', spec_set=True, autospec=True)
-    def test_create_ports_if_not_exist(self, port_mock, log_mock):
+    def test_create_ports_if_not_exist(self, log_mock):
         macs = {'aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb'}
-        node_id = self.node.id
-        port_dict1 = {'address': 'aa:aa:aa:aa:aa:aa', 'node_id': node_id}
-        port_dict2 = {'address': 'bb:bb:bb:bb:bb:bb', 'node_id': node_id}
-        port_obj1, port_obj2 = mock.MagicMock(), mock.MagicMock()
-        port_mock.side_effect = [port_obj1, port_obj2]
         with task_manager.acquire(self.context, self.node.uuid,
                                   shared=False) as task:
             utils.create_ports_if_not_exist(task, macs)
-            self.assertTrue(log_mock.called)
-            expected_calls = [mock.call(task.context, **port_dict1),
-                              mock.call(task.context, **port_dict2)]
-            port_mock.assert_has_calls(expected_calls, any_order=True)
-            port_obj1.create.assert_called_once_with()
-            port_obj2.create.assert_called_once_with()
+        self.assertEqual(2, log_mock.call_count)
+        ports = objects.Port.list_by_node_id(self.context, self.node.id)
+        self.assertEqual(macs, {port.address for port in ports})
+
+    @mock.patch.object(objects.Port, 'create', spec_set=True, autospec=True)
+    @mock.patch.object(objects.Port, 'create_many', spec_set=True,
+                       autospec=True)
+    def test_create_ports_if_not_exist_single_insert(self, create_many_mock,
+                                                     create_mock):
+        macs = ['aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb']
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            utils.create_ports_if_not_exist(task, macs)
+            create_many_mock.assert_called_once_with(task.context, mock.ANY)
+        ports = create_many_mock.call_args[0][1]
+        self.assertEqual(macs, [port.address for port in ports])
+        self.assertTrue(all(port.node_id == self.node.id for port in ports))
+        self.assertFalse(create_mock.called)
 
     @mock.patch.object(utils.LOG, 'warning', spec_set=True, autospec=True)
     @mock.patch.object(utils.LOG, 'info', spec_set=True, autospec=True)
     @mock.patch.object(objects.Port, 'create', spec_set=True, autospec=True)
+    @mock.patch.object(objects.Port, 'create_many', spec_set=True,
+                       autospec=True)
     def test_create_ports_if_not_exist_mac_exception(self,
+                                                     create_many_mock,
                                                      create_mock,
                                                      log_mock,
                                                      warn_mock):
+        # The second bulk insert races with another port creation.
+        create_many_mock.side_effect = exception.MACAlreadyExists('f')
         create_mock.side_effect = exception.MACAlreadyExists('f')
+        db_utils.create_test_port(node_id=self.node.id,
+                                  address='aa:aa:aa:aa:aa:aa')
         macs = {'aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb',
                 'aa:aa:aa:aa:aa:aa:bb:bb'}  # WWN
         with task_manager.acquire(self.context, self.node.uuid,
                                   shared=False) as task:
             utils.create_ports_if_not_exist(task, macs)
+        self.assertEqual(2, create_many_mock.call_count)
         self.assertEqual(2, log_mock.call_count)
-        self.assertEqual(2, create_mock.call_count)
+        self.assertEqual(1, create_mock.call_count)
         self.assertEqual(1, warn_mock.call_count)
 
     @mock.patch.object(utils.LOG, 'info', spec_set=True, autospec=True)
-    @mock.patch.object(objects, 'Port', spec_set=True, autospec=True)
-    def test_create_ports_if_not_exist_attempts_port_creation_blindly(
-            self, port_mock, log_info_mock):
-        macs = {'aa:bb:cc:dd:ee:ff', 'aa:bb:aa:aa:aa:aa'}
-        node_id = self.node.id
-        port_dict1 = {'address': 'aa:bb:cc:dd:ee:ff', 'node_id': node_id}
-        port_dict2 = {'address': 'aa:bb:aa:aa:aa:aa', 'node_id': node_id}
+    @mock.patch.object(objects.Port, 'create', spec_set=True, autospec=True)
+    @mock.patch.object(objects.Port, 'create_many', spec_set=True,
+                       autospec=True, side_effect=objects.Port.create_many)
+    def test_create_ports_if_not_exist_existing_bulk_retry(self,
+                                                           create_many_mock,
+                                                           create_mock,
+                                                           log_mock):
+        db_utils.create_test_port(node_id=self.node.id,
+                                  address='aa:aa:aa:aa:aa:aa')
+        macs = ['aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb',
+                'cc:cc:cc:cc:cc:cc']
         with task_manager.acquire(self.context, self.node.uuid,
                                   shared=False) as task:
             utils.create_ports_if_not_exist(task, macs)
-            self.assertTrue(log_info_mock.called)
-            expected_calls = [mock.call(task.context, **port_dict1),
-                              mock.call(task.context, **port_dict2)]
-            port_mock.assert_has_calls(expected_calls, any_order=True)
-            self.assertEqual(2, port_mock.return_value.create.call_count)
+        self.assertEqual(2, create_many_mock.call_count)
+        retried = create_many_mock.call_args[0][1]
+        self.assertEqual(macs[1:], [port.address for port in retried])
+        self.assertFalse(create_mock.called)
+        self.assertEqual(3, log_mock.call_count)
+        ports = objects.Port.list_by_node_id(self.context, self.node.id)
+        self.assertEqual(set(macs), {port.address for port in ports})
+
+    @mock.patch.object(utils.LOG, 'info', spec_set=True, autospec=True)
+    def test_create_ports_if_not_exist_partially_existing(self, log_mock):
+        obj_utils.create_test_port(self.context, node_id=self.node.id,
+                                   address='aa:aa:aa:aa:aa:aa')
+        macs = ['aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb']
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            utils.create_ports_if_not_exist(task, macs)
+        self.assertEqual(2, log_mock.call_count)
+        ports = objects.Port.list_by_node_id(self.context, self.node.id)
+        self.assertEqual(set(macs), {port.address for port in ports})
+
+    @mock.patch.object(objects.Port, 'create_many', spec_set=True,
+                       autospec=True)
+    def test_create_ports_if_not_exist_no_valid_macs(self, create_many_mock):
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            utils.create_ports_if_not_exist(task, ['aa:aa:aa:aa:aa:aa:bb:bb'])
+        self.assertFalse(create_many_mock.called)
 
 
 class SwiftCleanUp(db_base.DbTestCase):
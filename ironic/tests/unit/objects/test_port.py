@@ -99,6 +99,45 @@ class TestPortObject(db_base.DbTestCase, obj_utils.SchemasTestMixIn):
                 args, _kwargs = mock_create_port.call_args
                 self.assertEqual(objects.Port.VERSION, args[0]['version'])
 
+    def test_create_many(self):
+        ports = [objects.Port(self.context, address='52:54:00:cf:2d:31',
+                              node_id=123),
+                 objects.Port(self.context, address='52:54:00:cf:2d:32',
+                              node_id=123)]
+        with mock.patch.object(self.dbapi, 'create_ports',
+                               autospec=True) as mock_create_ports:
+            uuid1 = '1be26c0b-03f2-4d2e-ae87-c02d7f33c781'
+            uuid2 = '2be26c0b-03f2-4d2e-ae87-c02d7f33c781'
+            mock_create_ports.return_value = [
+                db_utils.get_test_port(id=1, uuid=uuid1,
+                                       address='52:54:00:cf:2d:31'),
+                db_utils.get_test_port(id=2, uuid=uuid2,
+                                       address='52:54:00:cf:2d:32')]
+
+            objects.Port.create_many(self.context, ports)
+
+            args, _kwargs = mock_create_ports.call_args
+            self.assertEqual(['52:54:00:cf:2d:31', '52:54:00:cf:2d:32'],
+                             [v['address'] for v in args[0]])
+            self.assertTrue(all(v['version'] == objects.Port.VERSION
+                                for v in args[0]))
+            for port, db_port in zip(ports,
+                                     mock_create_ports.return_value):
+                self.assertEqual(db_port['id'], port.id)
+                self.assertEqual(db_port['uuid'], port.uuid)
+                self.assertEqual({}, port.obj_get_changes())
+
+    def test_get_existing_addresses(self):
+        addresses = ['52:54:00:cf:2d:31', '52:54:00:cf:2d:32']
+        with mock.patch.object(self.dbapi, 'get_existing_port_addresses',
+                               autospec=True) as mock_get_existing:
+            mock_get_existing.return_value = addresses[:1]
+
+            res = objects.Port.get_existing_addresses(self.context, addresses)
+
+            mock_get_existing.assert_called_once_with(addresses)
+            self.assertEqual(addresses[:1], res)
+
     def test_save(self):
         uuid = self.fake_port['uuid']
         address = "b2:54:00:cf:2d:40"